@@ -155,8 +155,11 @@ def main():
     )
 
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
+        # 先写临时文件再原子替换，中断时不会留下半截的输出文件
+        tmp_path = args.output + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             f.write(text)
+        os.replace(tmp_path, args.output)
         print(f"\nTranscription saved to: {args.output}")
     else:
         print("\n--- Transcription ---")
@@ -0,0 +1,17 @@
+"""Shared HTTP session for the nine-grid-video scripts.
+
+Scripts import SESSION instead of calling requests.get/post directly so that
+every request in a run reuses pooled keep-alive connections.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Default Retry only retries idempotent methods, so POST submits are never duplicated
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
@@ -13,6 +13,7 @@ Usage:
 import argparse
 import os
 import sys
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
@@ -44,7 +45,28 @@ def safe_print(msg: str):
         print(msg, flush=True)
 
 
-def extract_panel_from_grid(client, grid_image: Image.Image, panel_name: str, output_path: str) -> bool:
+class RateLimiter:
+    """Space out requests evenly to stay under a requests-per-minute quota."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.lock = Lock()
+        self.next = 0.0
+
+    def acquire(self):
+        """Block until the caller is allowed to issue the next request."""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next - now
+            self.next = max(now, self.next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def extract_panel_from_grid(client, grid_image: Image.Image, panel_name: str, output_path: str,
+                            limiter: RateLimiter = None) -> bool:
     """Extract and upscale a specific panel from the grid image. Returns True on success."""
     position = PANEL_POSITIONS.get(panel_name, "unknown")
 
@@ -64,6 +86,8 @@ Instructions:
 IMPORTANT: Your output must be a single scene, not a grid of panels."""
 
     try:
+        if limiter:
+            limiter.acquire()
         response = client.models.generate_content(
             model="gemini-3-pro-image-preview",
             contents=[prompt, grid_image],
@@ -90,17 +114,18 @@ IMPORTANT: Your output must be a single scene, not a grid of panels."""
         return False
 
 
-def extract_panel_task(client, grid_image: Image.Image, panel_name: str, output_path: str) -> dict:
+def extract_panel_task(client, grid_image: Image.Image, panel_name: str, output_path: str,
+                       limiter: RateLimiter = None) -> dict:
     """Task function for parallel extraction."""
     safe_print(f"[{panel_name}] Extracting from grid...")
 
     try:
-        success = extract_panel_from_grid(client, grid_image, panel_name, output_path)
+        success = extract_panel_from_grid(client, grid_image, panel_name, output_path, limiter)
 
         if success and os.path.exists(output_path):
-            saved_img = Image.open(output_path)
-            safe_print(f"[{panel_name}]   Output size: {saved_img.size}")
-            saved_img.close()
+            # Image.open only parses the header here; no pixel data is decoded
+            with Image.open(output_path) as saved_img:
+                safe_print(f"[{panel_name}]   Output size: {saved_img.size}")
             safe_print(f"[{panel_name}]   Saved: {output_path}")
             return {"name": panel_name, "status": "success", "path": output_path}
         else:
@@ -120,6 +145,8 @@ def main():
                        help="Comma-separated list of panels to extract (default: all)")
     parser.add_argument("--parallel", type=int, default=9,
                        help="Max parallel tasks (default: 9)")
+    parser.add_argument("--rpm", type=float, default=10,
+                       help="Max Gemini requests per minute, 0 to disable (default: 10)")
     args = parser.parse_args()
 
     api_key = os.environ.get("GEMINI_API_KEY")
@@ -151,6 +178,7 @@ def main():
     print(f"\n=== Extracting {len(valid_panels)} panels in parallel (max {args.parallel} workers) ===\n")
 
     results = []
+    limiter = RateLimiter(args.rpm)
 
     with ThreadPoolExecutor(max_workers=args.parallel) as executor:
         futures = []
@@ -161,7 +189,8 @@ def main():
                 client,
                 grid_image,
                 panel,
-                output_path
+                output_path,
+                limiter
             )
             futures.append(future)
 
@@ -6,14 +6,16 @@ Usage:
 """
 
 import argparse
+import hashlib
 import json
 import os
 import sys
 from pathlib import Path
 
-import requests
 from dotenv import load_dotenv
 
+from _http import SESSION
+
 load_dotenv()
 
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
@@ -56,7 +58,7 @@ def text_to_speech(api_key: str, text: str, voice_id: str, output_path: str,
         }
     }
 
-    response = requests.post(url, json=data, headers=headers)
+    response = SESSION.post(url, json=data, headers=headers)
 
     if response.status_code == 200:
         with open(output_path, "wb") as f:
@@ -67,11 +69,25 @@ def text_to_speech(api_key: str, text: str, voice_id: str, output_path: str,
         return False
 
 
+def audio_digest(text: str, voice_id: str, model_id: str) -> str:
+    """Hash the inputs that determine the generated audio."""
+    return hashlib.blake2b(f"{voice_id}|{model_id}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def is_cached(output_path: str, digest: str) -> bool:
+    """Check whether output_path was generated from the same inputs."""
+    sidecar = os.path.splitext(output_path)[0] + ".sha"
+    if not os.path.exists(output_path) or not os.path.exists(sidecar):
+        return False
+    with open(sidecar, "r", encoding="utf-8") as f:
+        return f.read().strip() == digest
+
+
 def get_voices(api_key: str) -> list:
     """Get list of available voices."""
     url = f"{ELEVENLABS_API_URL}/voices"
     headers = {"xi-api-key": api_key}
-    response = requests.get(url, headers=headers)
+    response = SESSION.get(url, headers=headers)
     if response.status_code == 200:
         return response.json().get("voices", [])
     return []
@@ -84,6 +100,7 @@ def main():
     parser.add_argument("--model", default="eleven_multilingual_v2",
                        help="TTS model (default: eleven_multilingual_v2)")
     parser.add_argument("--output", required=True, help="Output directory for audio files")
+    parser.add_argument("--force", action="store_true", help="Regenerate audio even if cached")
     parser.add_argument("--list-voices", action="store_true", help="List available voices and exit")
     args = parser.parse_args()
 
@@ -120,20 +137,33 @@ def main():
     else:
         narration_list = [{"scene": k, "text": v.get("text", "")} for k, v in data.get("narrations", {}).items()]
 
-    total = len(narration_list)
-    success = 0
-
+    # Drop placeholder entries up front so only real work is queued
+    work = []
     for i, item in enumerate(narration_list):
-        scene_name = item.get("scene", f"scene_{i+1:02d}")
         text = item.get("text", "")
-        if not text or text.startswith("["):  # Skip placeholder text
-            print(f"[{i+1}/{total}] Skipping {scene_name} (no text)")
+        if not text or text.startswith("["):
+            continue
+        scene_name = item.get("scene", f"scene_{i+1:02d}")
+        work.append((scene_name, text, os.path.join(args.output, f"{scene_name}.mp3")))
+    skipped = len(narration_list) - len(work)
+    if skipped:
+        print(f"Skipping {skipped} scene(s) with no text")
+
+    total = len(work)
+    success = 0
+
+    for i, (scene_name, text, output_path) in enumerate(work):
+        digest = audio_digest(text, voice_id, args.model)
+        if not args.force and is_cached(output_path, digest):
+            print(f"[{i+1}/{total}] Cached: {output_path}")
+            success += 1
             continue
 
         print(f"[{i+1}/{total}] Generating audio for {scene_name}...")
-        output_path = os.path.join(args.output, f"{scene_name}.mp3")
 
         if text_to_speech(api_key, text, voice_id, output_path, args.model):
+            with open(os.path.splitext(output_path)[0] + ".sha", "w", encoding="utf-8") as f:
+                f.write(digest)
             print(f"  Saved: {output_path}")
             success += 1
         else:
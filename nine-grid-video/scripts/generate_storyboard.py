@@ -41,7 +41,7 @@ def get_output_dir(base_output: str) -> Path:
 
 
 def generate_storyboard(client, prompt: str, aspect_ratio: str = "1:1"):
-    """Generate a nine-grid storyboard image."""
+    """Generate a nine-grid storyboard image. Returns the encoded image bytes."""
 
     full_prompt = f"""{prompt}
 
@@ -68,8 +68,9 @@ Important requirements:
     for part in response.parts:
         if part.text is not None:
             print(f"Model response: {part.text[:200]}")
-        elif image := part.as_image():
-            return image
+        elif part.inline_data and (part.inline_data.mime_type or "").startswith("image/"):
+            # Return the API-encoded bytes directly; no PIL decode/re-encode round trip
+            return part.inline_data.data
     return None
 
 
@@ -112,11 +113,11 @@ def main():
     print(f"Output directory: {output_dir}")
 
     print("Generating nine-grid storyboard...")
-    image = generate_storyboard(client, prompt, args.aspect_ratio)
+    image_data = generate_storyboard(client, prompt, args.aspect_ratio)
 
-    if image:
+    if image_data:
         output_path = output_dir / "storyboard.png"
-        image.save(str(output_path))
+        output_path.write_bytes(image_data)
         print(f"Saved: {output_path}")
 
         # Save prompt for reference
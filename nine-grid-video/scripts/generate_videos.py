@@ -9,48 +9,87 @@ Usage:
 """
 
 import argparse
+import functools
+import io
 import json
+import logging
 import os
+import queue
+import random
+import shutil
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from threading import Lock
 
 import requests
+import urllib3
 from dotenv import load_dotenv
 
+from _http import SESSION
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 load_dotenv()
 
 BASE_URL = "https://yunwu.ai"
-print_lock = Lock()
+POLL_BASE_DELAY = 3
+POLL_MAX_DELAY = 30
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_SEGMENTS = 4
+MAX_SUBMIT_WORKERS = 4  # submits are bound by upload bandwidth
+
+# Workers log through a queue; a single listener thread writes to stdout
+logger = logging.getLogger("generate_videos")
+
 
+def start_log_listener() -> QueueListener:
+    """Route logger output through a lock-free queue to stdout."""
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, handler)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    return listener
 
-def safe_print(msg: str):
-    """Thread-safe print."""
-    with print_lock:
-        print(msg)
 
+def poll_delay(attempt: int, rng: random.Random) -> float:
+    """Exponential backoff with jitter between status polls."""
+    return min(POLL_MAX_DELAY, POLL_BASE_DELAY * 2 ** attempt) * (0.5 + rng.random() * 0.5)
 
-def create_video(api_key: str, prompt: str, first_frame_path: str,
+
+@functools.lru_cache(maxsize=16)
+def load_frame(frame_path: str) -> bytes:
+    """Read a frame image once and reuse the bytes across submits/retries."""
+    return Path(frame_path).read_bytes()
+
+
+def create_video(api_key: str, prompt: str, frame_bytes: bytes, frame_name: str,
                 model: str = "veo_3_1-fast", seconds: str = "8",
                 size: str = "9x16") -> dict:
     """Create a video generation task with first frame reference."""
     url = f"{BASE_URL}/v1/videos"
     headers = {"Authorization": f"Bearer {api_key}"}
 
-    with open(first_frame_path, "rb") as f:
-        files = {
-            "input_reference": (os.path.basename(first_frame_path), f, "image/png"),
-        }
-        data = {
-            "model": model,
-            "prompt": prompt,
-            "seconds": seconds,
-            "size": size,
-            "watermark": "false",
-        }
-        response = requests.post(url, headers=headers, data=data, files=files)
+    files = {
+        "input_reference": (frame_name, io.BytesIO(frame_bytes), "image/png"),
+    }
+    data = {
+        "model": model,
+        "prompt": prompt,
+        "seconds": seconds,
+        "size": size,
+        "watermark": "false",
+    }
+    response = SESSION.post(url, headers=headers, data=data, files=files)
 
     response.raise_for_status()
     return response.json()
@@ -63,18 +102,73 @@ def query_status(api_key: str, video_id: str) -> dict:
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
-    response = requests.get(url, headers=headers)
+    response = SESSION.get(url, headers=headers)
     response.raise_for_status()
-    return response.json()
+    return json_loads(response.content)
 
 
-def download_video(video_url: str, output_path: str) -> bool:
-    """Download completed video from URL."""
-    response = requests.get(video_url, stream=True)
-    response.raise_for_status()
-    with open(output_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+def _download_range(video_url: str, output_path: str, start: int, end: int) -> bool:
+    """Download bytes [start, end] into the preallocated output file.
+
+    Returns False on any failure so the caller falls back to a single stream.
+    """
+    try:
+        with SESSION.get(video_url, headers={"Range": f"bytes={start}-{end}"}, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return False
+            response.raw.decode_content = True
+            with open(output_path, "r+b") as f:
+                f.seek(start)
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+        return True
+    except (requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+        logger.info(f"  Range {start}-{end} failed ({e}), falling back to single stream")
+        return False
+
+
+def download_video(video_url: str, output_path: str, segments: int = DOWNLOAD_SEGMENTS) -> bool:
+    """Download completed video from URL.
+
+    Uses parallel HTTP Range requests when the server advertises byte ranges,
+    falling back to a single stream otherwise. Data goes to a .part file that
+    is renamed into place on success, so output_path only ever holds a
+    complete video.
+    """
+    part_path = output_path + ".part"
+    size = 0
+    if segments > 1:
+        try:
+            head = SESSION.head(video_url, allow_redirects=True)
+            if head.ok and head.headers.get("Accept-Ranges", "").lower() == "bytes":
+                size = int(head.headers.get("Content-Length", 0))
+        except (requests.RequestException, ValueError):
+            size = 0
+
+    if size >= segments * DOWNLOAD_CHUNK_SIZE:
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        step = size // segments
+        ranges = [(i * step, size - 1 if i == segments - 1 else (i + 1) * step - 1)
+                  for i in range(segments)]
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            ok = list(executor.map(lambda r: _download_range(video_url, part_path, *r), ranges))
+        if all(ok):
+            os.replace(part_path, output_path)
+            return True
+
+    try:
+        with SESSION.get(video_url, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(part_path, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+    except BaseException:
+        # Don't leave a half-written .part behind
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, output_path)
     return True
 
 
@@ -82,16 +176,17 @@ def submit_video_task(api_key: str, name: str, prompt: str, first_frame_path: st
                       output_path: str, model: str = "veo_3_1-fast") -> dict:
     """Submit a video generation task and return task info."""
     try:
-        safe_print(f"[{name}] Submitting task...")
-        safe_print(f"[{name}]   First frame: {first_frame_path}")
+        logger.info(f"[{name}] Submitting task...")
+        logger.info(f"[{name}]   First frame: {first_frame_path}")
 
-        result = create_video(api_key, prompt, first_frame_path, model=model)
+        frame_bytes = load_frame(first_frame_path)
+        result = create_video(api_key, prompt, frame_bytes, os.path.basename(first_frame_path), model=model)
         video_id = result.get("id")
         if not video_id:
-            safe_print(f"[{name}]   Error: No video ID returned: {result}")
+            logger.info(f"[{name}]   Error: No video ID returned: {result}")
             return {"name": name, "status": "failed", "error": "No video ID"}
 
-        safe_print(f"[{name}]   Task created: {video_id}")
+        logger.info(f"[{name}]   Task created: {video_id}")
         return {
             "name": name,
             "video_id": video_id,
@@ -100,7 +195,7 @@ def submit_video_task(api_key: str, name: str, prompt: str, first_frame_path: st
         }
 
     except Exception as e:
-        safe_print(f"[{name}]   Submit error: {e}")
+        logger.info(f"[{name}]   Submit error: {e}")
         return {"name": name, "status": "failed", "error": str(e)}
 
 
@@ -110,33 +205,39 @@ def poll_and_download(api_key: str, task: dict) -> dict:
     video_id = task["video_id"]
     output_path = task["output_path"]
 
+    rng = random.Random(os.urandom(8))
+    attempt = 0
+    last_status = None
+
     try:
         while True:
-            time.sleep(15)
+            time.sleep(poll_delay(attempt, rng))
             status_result = query_status(api_key, video_id)
             status = status_result.get("status", "")
+            attempt = 0 if status != last_status else attempt + 1
+            last_status = status
 
             if status == "completed":
                 video_url = status_result.get("video_url")
-                safe_print(f"[{name}] Completed! Downloading...")
+                logger.info(f"[{name}] Completed! Downloading...")
                 download_video(video_url, output_path)
-                safe_print(f"[{name}] Saved: {output_path}")
+                logger.info(f"[{name}] Saved: {output_path}")
                 return {"name": name, "status": "success", "path": output_path}
 
             elif status in ("queued", "pending", "processing", "in_progress"):
                 progress = status_result.get("progress", 0)
-                safe_print(f"[{name}] Status: {status}, progress: {progress}%")
+                logger.info(f"[{name}] Status: {status}, progress: {progress}%")
 
             elif status == "failed":
-                safe_print(f"[{name}] Task failed: {status_result}")
+                logger.info(f"[{name}] Task failed: {status_result}")
                 return {"name": name, "status": "failed", "error": status_result}
 
             else:
                 progress = status_result.get("progress", 0)
-                safe_print(f"[{name}] Status: {status}, progress: {progress}%")
+                logger.info(f"[{name}] Status: {status}, progress: {progress}%")
 
     except Exception as e:
-        safe_print(f"[{name}] Poll error: {e}")
+        logger.info(f"[{name}] Poll error: {e}")
         return {"name": name, "status": "failed", "error": str(e)}
 
 
@@ -144,19 +245,20 @@ def generate_videos_parallel(api_key: str, tasks_info: list, model: str,
                             max_workers: int = 8) -> list:
     """Generate all videos in parallel.
 
-    Phase 1: Submit all tasks concurrently
-    Phase 2: Poll and download all tasks concurrently
+    Submits all tasks concurrently; each task starts polling as soon as its
+    own submit finishes, without waiting for the remaining submits.
+    Submits upload a 2K frame each, so they get a small pool of their own;
+    polls are tiny GETs and get a much wider one.
     """
     results = []
-    submitted_tasks = []
 
-    # Phase 1: Submit all tasks in parallel
-    safe_print(f"\n=== Phase 1: Submitting {len(tasks_info)} tasks in parallel ===\n")
+    logger.info(f"\n=== Submitting {len(tasks_info)} tasks and polling as they are accepted ===\n")
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, MAX_SUBMIT_WORKERS)) as submit_executor, \
+            ThreadPoolExecutor(max_workers=max_workers * 4) as poll_executor:
+        pending = set()
         for info in tasks_info:
-            future = executor.submit(
+            future = submit_executor.submit(
                 submit_video_task,
                 api_key,
                 info["name"],
@@ -165,27 +267,16 @@ def generate_videos_parallel(api_key: str, tasks_info: list, model: str,
                 info["output_path"],
                 model
             )
-            futures.append(future)
-
-        for future in as_completed(futures):
-            result = future.result()
-            if result.get("status") == "submitted":
-                submitted_tasks.append(result)
-            else:
-                results.append(result)
+            pending.add(future)
 
-    safe_print(f"\n=== Phase 2: Polling {len(submitted_tasks)} tasks in parallel ===\n")
-
-    # Phase 2: Poll all submitted tasks in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = []
-        for task in submitted_tasks:
-            future = executor.submit(poll_and_download, api_key, task)
-            futures.append(future)
-
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result.get("status") == "submitted":
+                    pending.add(poll_executor.submit(poll_and_download, api_key, result))
+                else:
+                    results.append(result)
 
     return results
 
@@ -196,7 +287,8 @@ def generate_single_video(api_key: str, prompt: str, first_frame_path: str,
     try:
         print(f"  First frame: {first_frame_path}")
 
-        result = create_video(api_key, prompt, first_frame_path, model=model)
+        frame_bytes = load_frame(first_frame_path)
+        result = create_video(api_key, prompt, frame_bytes, os.path.basename(first_frame_path), model=model)
         video_id = result.get("id")
         if not video_id:
             print(f"  Error: No video ID returned: {result}")
@@ -205,10 +297,15 @@ def generate_single_video(api_key: str, prompt: str, first_frame_path: str,
         print(f"  Task created: {video_id}")
 
         # Poll for completion
+        rng = random.Random(os.urandom(8))
+        attempt = 0
+        last_status = None
         while True:
-            time.sleep(15)
+            time.sleep(poll_delay(attempt, rng))
             status_result = query_status(api_key, video_id)
             status = status_result.get("status", "")
+            attempt = 0 if status != last_status else attempt + 1
+            last_status = status
 
             if status == "completed":
                 video_url = status_result.get("video_url")
@@ -241,6 +338,8 @@ def main():
                        help="Model to use")
     parser.add_argument("--parallel", type=int, default=8,
                        help="Max parallel tasks (default: 8, use 1 for serial mode)")
+    parser.add_argument("--force", action="store_true",
+                       help="Regenerate videos even if the output file already exists")
     args = parser.parse_args()
 
     api_key = os.environ.get("YUNWU_API_KEY")
@@ -250,8 +349,8 @@ def main():
 
     os.makedirs(args.output, exist_ok=True)
 
-    with open(args.prompts, "r", encoding="utf-8") as f:
-        prompts = json.load(f)
+    with open(args.prompts, "rb") as f:
+        prompts = json_loads(f.read())
 
     total = len(prompts)
 
@@ -266,6 +365,7 @@ def main():
 
     # Prepare task info
     tasks_info = []
+    skipped = 0
     for i, item in enumerate(prompts):
         name = item["name"]
         prompt = item["prompt"]
@@ -277,6 +377,11 @@ def main():
             continue
 
         output_path = os.path.join(args.output, f"{name}.mp4")
+        if not args.force and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            print(f"Skipping {name}: {output_path} already exists")
+            skipped += 1
+            continue
+
         tasks_info.append({
             "name": name,
             "prompt": prompt,
@@ -300,10 +405,16 @@ def main():
     else:
         # Parallel mode (default)
         print(f"Running in parallel mode (max {args.parallel} workers)...")
-        results = generate_videos_parallel(api_key, tasks_info, args.model, args.parallel)
+        listener = start_log_listener()
+        try:
+            results = generate_videos_parallel(api_key, tasks_info, args.model, args.parallel)
+        finally:
+            listener.stop()
         success_count = sum(1 for r in results if r.get("status") == "success")
 
-    print(f"\n{success_count}/{total} videos generated successfully")
+    if skipped:
+        print(f"\n{skipped} video(s) already existed and were skipped")
+    print(f"\n{success_count + skipped}/{total} videos available")
     print("Done!")
 
 
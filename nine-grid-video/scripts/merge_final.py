@@ -13,8 +13,18 @@ import argparse
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Normalize timestamps/container layout per segment so the final concat can stream-copy
+SEGMENT_MUX_FLAGS = ["-fflags", "+genpts", "-avoid_negative_ts", "make_zero", "-movflags", "+faststart"]
+
+# Every muxed segment gets the same audio format, so copy-concat never mixes audio streams
+SEGMENT_AUDIO_FLAGS = ["-c:a", "aac", "-ar", "48000", "-ac", "2"]
+
+# ffprobe results keyed by (absolute path, mtime)
+_duration_cache = {}
+
 
 def get_video_duration(video_path: str) -> float:
     """Get video duration in seconds using ffprobe."""
@@ -30,11 +40,35 @@ def get_video_duration(video_path: str) -> float:
     return 0.0
 
 
+def probe_durations(paths: list) -> dict:
+    """Probe media durations concurrently, cached by absolute path + mtime."""
+    keys = {}
+    for p in paths:
+        p = os.path.abspath(str(p))
+        keys[p] = (p, os.path.getmtime(p))
+    missing = [p for p, key in keys.items() if key not in _duration_cache]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+            for p, duration in zip(missing, executor.map(get_video_duration, missing)):
+                _duration_cache[keys[p]] = duration
+    return {p: _duration_cache[key] for p, key in keys.items()}
+
+
+def has_audio_stream(video_path: str) -> bool:
+    """Check whether a media file contains at least one audio stream."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a",
+        "-show_entries", "stream=codec_type",
+        "-of", "csv=p=0",
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+
 def add_audio_to_video(video_path: str, audio_path: str, output_path: str) -> bool:
     """Add audio track to video, adjusting audio to fit video duration."""
-    # Get video duration
-    video_duration = get_video_duration(video_path)
-
     if os.path.exists(audio_path):
         # Mix video with audio, fade audio if needed
         cmd = [
@@ -42,20 +76,54 @@ def add_audio_to_video(video_path: str, audio_path: str, output_path: str) -> bo
             "-i", video_path,
             "-i", audio_path,
             "-c:v", "copy",
-            "-c:a", "aac",
+            *SEGMENT_AUDIO_FLAGS,
             "-map", "0:v:0",
             "-map", "1:a:0",
             "-shortest",
+            *SEGMENT_MUX_FLAGS,
+            output_path
+        ]
+    elif has_audio_stream(video_path):
+        # No narration: keep the clip's own audio, re-encoded to the shared format
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_path,
+            "-c:v", "copy",
+            *SEGMENT_AUDIO_FLAGS,
+            "-map", "0:v:0",
+            "-map", "0:a:0",
+            *SEGMENT_MUX_FLAGS,
             output_path
         ]
     else:
-        # No audio, just copy video
-        cmd = ["ffmpeg", "-y", "-i", video_path, "-c", "copy", output_path]
+        # No audio at all: add a silent track so every segment has the same streams
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_path,
+            "-f", "lavfi", "-i", "anullsrc=cl=stereo:r=48000",
+            "-c:v", "copy",
+            *SEGMENT_AUDIO_FLAGS,
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-shortest",
+            *SEGMENT_MUX_FLAGS,
+            output_path
+        ]
 
     result = subprocess.run(cmd, capture_output=True, text=True)
     return result.returncode == 0
 
 
+def _mux_one(job: tuple) -> str:
+    """Mux narration into one segment; returns the path to use for concat."""
+    video_path, audio_path, output_path = job
+    if add_audio_to_video(str(video_path), str(audio_path), str(output_path)):
+        print(f"  {video_path.stem}: added audio {audio_path.name if audio_path.exists() else 'none'}")
+        return str(output_path)
+    print(f"  {video_path.stem}: Warning: Failed to process, using original")
+    return str(video_path)
+
+
 def concatenate_videos(video_files: list, output_path: str) -> bool:
     """Concatenate multiple videos using ffmpeg concat demuxer."""
     if len(video_files) == 0:
@@ -76,20 +144,21 @@ def concatenate_videos(video_files: list, output_path: str) -> bool:
             abs_path = os.path.abspath(vf).replace("'", "'\\''")
             f.write(f"file '{abs_path}'\n")
 
-    # Try stream copy first (faster, but may fail if formats differ)
+    # Segments muxed by add_audio_to_video share one layout, so stream copy normally works
     cmd = [
         "ffmpeg", "-y",
         "-f", "concat",
         "-safe", "0",
         "-i", concat_list_path,
         "-c", "copy",
+        "-movflags", "+faststart",
         output_path
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
 
     if result.returncode != 0:
+        # Originals (--no-audio, or a segment whose mux failed) may not match
         print("Stream copy failed, retrying with re-encoding...")
-        # Re-encode to ensure compatibility
         cmd = [
             "ffmpeg", "-y",
             "-f", "concat",
@@ -98,9 +167,12 @@ def concatenate_videos(video_files: list, output_path: str) -> bool:
             "-c:v", "libx264",
             "-c:a", "aac",
             "-shortest",
+            "-movflags", "+faststart",
             output_path
         ]
         result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr.strip()[-2000:])
 
     # Cleanup
     if os.path.exists(concat_list_path):
@@ -109,12 +181,70 @@ def concatenate_videos(video_files: list, output_path: str) -> bool:
     return result.returncode == 0
 
 
+def merge_single_pass(video_files: list, audio_dir: str, output_path: str) -> bool:
+    """Mux narration and concatenate all segments in one ffmpeg filtergraph.
+
+    Each segment is cut to min(video, narration) like the -shortest mux step;
+    scenes without narration keep the clip's own audio like add_audio_to_video,
+    and only clips with no audio stream get silence, so every segment has the
+    same shape.
+    Re-encodes the video, but needs no temp files and only one ffmpeg process.
+    """
+    audio_files = [Path(audio_dir) / f"{v.stem}.mp3" for v in video_files]
+    durations = probe_durations(list(video_files) + [a for a in audio_files if a.exists()])
+
+    inputs = []
+    filters = []
+    labels = []
+    for i, (video_path, audio_path) in enumerate(zip(video_files, audio_files)):
+        duration = durations[os.path.abspath(str(video_path))]
+        if not duration:
+            print(f"Error: Could not probe duration of {video_path}")
+            return False
+        v_idx = len(inputs)
+        inputs.append(str(video_path))
+        if audio_path.exists():
+            audio_src = f"[{len(inputs)}:a]"
+            inputs.append(str(audio_path))
+            duration = min(duration, durations[os.path.abspath(str(audio_path))]) or duration
+        elif has_audio_stream(str(video_path)):
+            audio_src = f"[{v_idx}:a]"
+        else:
+            audio_src = "anullsrc=cl=stereo:r=48000,"
+        filters.append(f"[{v_idx}:v]trim=0:{duration},setpts=PTS-STARTPTS[v{i}]")
+        filters.append(
+            f"{audio_src}aresample=48000,aformat=channel_layouts=stereo,"
+            f"atrim=0:{duration},apad=whole_dur={duration},asetpts=PTS-STARTPTS[a{i}]"
+        )
+        labels.append(f"[v{i}][a{i}]")
+
+    filters.append(f"{''.join(labels)}concat=n={len(video_files)}:v=1:a=1[outv][outa]")
+    cmd = ["ffmpeg", "-y"]
+    for path in inputs:
+        cmd += ["-i", path]
+    cmd += [
+        "-filter_complex", ";".join(filters),
+        "-map", "[outv]", "-map", "[outa]",
+        "-c:v", "libx264", "-preset", "veryfast",
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        output_path
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr.strip()[-2000:])
+    return result.returncode == 0
+
+
 def main():
     parser = argparse.ArgumentParser(description="Merge videos and audio into final video")
     parser.add_argument("--videos", required=True, help="Directory with video segments")
     parser.add_argument("--audio", help="Directory with audio files (optional)")
     parser.add_argument("--output", required=True, help="Output final video path")
     parser.add_argument("--no-audio", action="store_true", help="Skip audio merging")
+    parser.add_argument("--single-pass", action="store_true",
+                       help="Mux and concat in one re-encoding ffmpeg call (no temp files)")
     args = parser.parse_args()
 
     # Check ffmpeg
@@ -134,32 +264,34 @@ def main():
 
     print(f"Found {len(video_files)} video segments")
 
+    if args.single_pass and args.audio and not args.no_audio:
+        print(f"\nMerging {len(video_files)} segments in a single pass...")
+        if merge_single_pass(video_files, args.audio, args.output):
+            print(f"\nFinal video saved: {args.output}")
+            print("Done!")
+            return
+        print("Error: Single-pass merge failed")
+        sys.exit(1)
+
     # Create temp directory for processed videos
     temp_dir = Path(args.output).parent / "temp_merge"
     temp_dir.mkdir(parents=True, exist_ok=True)
 
-    processed_videos = []
-
-    # Process each video segment
-    for i, video_path in enumerate(video_files):
-        scene_name = video_path.stem  # e.g., "scene_01"
-        print(f"\n[{i+1}/{len(video_files)}] Processing {scene_name}...")
-
-        if args.no_audio or not args.audio:
-            # No audio processing, use original video
-            processed_videos.append(str(video_path))
-            print(f"  Using original video (no audio)")
-        else:
-            # Try to find matching audio file
-            audio_path = Path(args.audio) / f"{scene_name}.mp3"
-            output_path = temp_dir / f"{scene_name}_with_audio.mp4"
-
-            if add_audio_to_video(str(video_path), str(audio_path), str(output_path)):
-                processed_videos.append(str(output_path))
-                print(f"  Added audio: {audio_path.name if audio_path.exists() else 'none'}")
-            else:
-                print(f"  Warning: Failed to process, using original")
-                processed_videos.append(str(video_path))
+    if args.no_audio or not args.audio:
+        # No audio processing, use original videos
+        processed_videos = [str(v) for v in video_files]
+        print("Using original videos (no audio)")
+    else:
+        # ffmpeg runs as separate processes, so segments mux concurrently;
+        # map() keeps results in scene order for the concat step
+        jobs = [
+            (video_path, Path(args.audio) / f"{video_path.stem}.mp3",
+             temp_dir / f"{video_path.stem}_with_audio.mp4")
+            for video_path in video_files
+        ]
+        print(f"\nAdding audio to {len(jobs)} segments...")
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            processed_videos = list(executor.map(_mux_one, jobs))
 
     # Concatenate all videos
     print(f"\nConcatenating {len(processed_videos)} videos...")
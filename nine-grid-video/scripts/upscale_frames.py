@@ -10,21 +10,26 @@ Usage:
 """
 
 import argparse
+import asyncio
+import io
 import os
+import random
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from threading import Lock
 
 from dotenv import load_dotenv
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 
 load_dotenv()
 
 print_lock = Lock()
 
+MAX_ATTEMPTS = 5
+MAX_INPUT_SIZE = 1024  # larger inputs are shrunk before upload
+
 
 def safe_print(msg: str):
     """Thread-safe print."""
@@ -32,16 +37,24 @@ def safe_print(msg: str):
         print(msg, flush=True)
 
 
-def upscale_single_frame(client, low_res_image: Image.Image, frame_name: str) -> Image.Image | None:
+def is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and server-side failures are worth retrying."""
+    if isinstance(error, errors.ServerError):
+        return True
+    return isinstance(error, errors.ClientError) and error.code == 429
+
+
+async def upscale_single_frame(client, low_res_image: Image.Image | types.Part,
+                               frame_name: str) -> bytes | None:
     """Upscale a single frame to 2K resolution using Gemini.
 
     Args:
         client: Gemini client
-        low_res_image: Low resolution PIL Image
+        low_res_image: Low resolution PIL Image (or pre-encoded image Part)
         frame_name: Frame name (e.g., "K1") for logging
 
     Returns:
-        High resolution PIL Image or None if failed
+        Encoded high resolution image bytes or None if failed
     """
     prompt = f"""Recreate this image at 2K resolution (2048x2048 pixels).
 
@@ -53,59 +66,103 @@ Core requirements:
 
 Reference: This is frame {frame_name} from a storyboard sequence."""
 
-    try:
-        response = client.models.generate_content(
-            model="gemini-3-pro-image-preview",
-            contents=[prompt, low_res_image],
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE"],
-                image_config=types.ImageConfig(
-                    aspect_ratio="1:1",
-                    image_size="2K",  # 输出 2048x2048
+    rng = random.Random(os.urandom(8))
+
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = await client.aio.models.generate_content(
+                model="gemini-3-pro-image-preview",
+                contents=[prompt, low_res_image],
+                config=types.GenerateContentConfig(
+                    response_modalities=["IMAGE"],
+                    image_config=types.ImageConfig(
+                        aspect_ratio="1:1",
+                        image_size="2K",  # 输出 2048x2048
+                    ),
                 ),
-            ),
-        )
-
-        for part in response.parts:
-            if image := part.as_image():
-                return image
-
-        return None
-
-    except Exception as e:
-        safe_print(f"[{frame_name}] Error: {e}")
-        return None
-
+            )
 
-def upscale_frame_task(client, input_path: str, output_path: str, frame_name: str) -> dict:
-    """Task function for parallel upscaling."""
-    safe_print(f"[{frame_name}] Upscaling...")
+            for part in response.parts:
+                if part.inline_data and (part.inline_data.mime_type or "").startswith("image/"):
+                    # 直接返回编码好的图片数据
+                    return part.inline_data.data
 
-    try:
-        # Load low-res image
-        low_res_img = Image.open(input_path)
-        safe_print(f"[{frame_name}]   Input size: {low_res_img.size}")
+            return None
 
-        # Upscale with Gemini
-        high_res_img = upscale_single_frame(client, low_res_img, frame_name)
+        except Exception as e:
+            if not is_retryable(e) or attempt == MAX_ATTEMPTS - 1:
+                safe_print(f"[{frame_name}] Error: {e}")
+                return None
+            delay = min(60, 2 ** attempt) * (0.5 + rng.random() * 0.5)
+            safe_print(f"[{frame_name}] Retryable error ({e}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
 
-        if high_res_img:
-            high_res_img.save(output_path)
-            # Get actual output size
-            saved_img = Image.open(output_path)
-            safe_print(f"[{frame_name}]   Output size: {saved_img.size}")
-            safe_print(f"[{frame_name}]   Saved: {output_path}")
-            return {"name": frame_name, "status": "success", "path": output_path}
-        else:
-            safe_print(f"[{frame_name}]   Failed to generate")
-            return {"name": frame_name, "status": "failed", "error": "No image generated"}
+    return None
 
-    except Exception as e:
-        safe_print(f"[{frame_name}]   Error: {e}")
-        return {"name": frame_name, "status": "failed", "error": str(e)}
 
+def _load_image(path: str, downscale: bool = True) -> tuple:
+    """Open an input frame (run off the event loop).
 
-def upscale_frames_parallel(client, input_dir: str, output_dir: str, max_workers: int = 9) -> list:
+    Returns (content, size), where content is what gets sent to Gemini.
+    Frames larger than MAX_INPUT_SIZE are shrunk and sent as JPEG.
+    """
+    img = Image.open(path)
+    img.load()
+    if not downscale or max(img.size) <= MAX_INPUT_SIZE:
+        return img, img.size
+
+    img.thumbnail((MAX_INPUT_SIZE, MAX_INPUT_SIZE), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=90)
+    return types.Part.from_bytes(data=buf.getvalue(), mime_type="image/jpeg"), img.size
+
+
+def _image_size(path: str) -> tuple:
+    """Read image dimensions from the file header."""
+    with Image.open(path) as img:
+        return img.size
+
+
+async def upscale_frame_task(sem: asyncio.Semaphore, client, input_path: str, output_path: str,
+                             frame_name: str, downscale: bool = True) -> dict:
+    """Task coroutine for parallel upscaling."""
+    async with sem:
+        safe_print(f"[{frame_name}] Upscaling...")
+
+        try:
+            # Load low-res image
+            low_res_img, input_size = await asyncio.to_thread(_load_image, input_path, downscale)
+            safe_print(f"[{frame_name}]   Input size: {input_size}")
+
+            # Upscale with Gemini
+            image_data = await upscale_single_frame(client, low_res_img, frame_name)
+
+            if image_data:
+                await asyncio.to_thread(Path(output_path).write_bytes, image_data)
+                output_size = await asyncio.to_thread(_image_size, output_path)
+                safe_print(f"[{frame_name}]   Output size: {output_size}")
+                safe_print(f"[{frame_name}]   Saved: {output_path}")
+                return {"name": frame_name, "status": "success", "path": output_path}
+            else:
+                safe_print(f"[{frame_name}]   Failed to generate")
+                return {"name": frame_name, "status": "failed", "error": "No image generated"}
+
+        except Exception as e:
+            safe_print(f"[{frame_name}]   Error: {e}")
+            return {"name": frame_name, "status": "failed", "error": str(e)}
+
+
+async def _upscale_all(client, frame_files: list, max_workers: int, downscale: bool) -> list:
+    """Run all upscale tasks on one event loop, at most max_workers in flight."""
+    sem = asyncio.Semaphore(max_workers)
+    return await asyncio.gather(*[
+        upscale_frame_task(sem, client, frame["input"], frame["output"], frame["name"], downscale)
+        for frame in frame_files
+    ])
+
+
+def upscale_frames_parallel(client, input_dir: str, output_dir: str, max_workers: int = 9,
+                            force: bool = False, downscale: bool = True) -> list:
     """Upscale all frames in parallel.
 
     Args:
@@ -113,6 +170,8 @@ def upscale_frames_parallel(client, input_dir: str, output_dir: str, max_workers
         input_dir: Directory containing K1.png - K9.png
         output_dir: Output directory for upscaled frames
         max_workers: Maximum parallel tasks
+        force: Re-upscale frames whose output already exists
+        downscale: Shrink inputs larger than MAX_INPUT_SIZE before upload
 
     Returns:
         List of result dicts
@@ -136,27 +195,23 @@ def upscale_frames_parallel(client, input_dir: str, output_dir: str, max_workers
         print(f"Error: No frame files (K1.png - K9.png) found in {input_dir}")
         return []
 
-    print(f"\n=== Upscaling {len(frame_files)} frames to 2K in parallel (max {max_workers} workers) ===\n")
-
     results = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = []
+    if not force:
+        pending = []
         for frame in frame_files:
-            future = executor.submit(
-                upscale_frame_task,
-                client,
-                frame["input"],
-                frame["output"],
-                frame["name"]
-            )
-            futures.append(future)
+            if os.path.exists(frame["output"]) and os.path.getsize(frame["output"]) > 0:
+                print(f"[{frame['name']}] Skipping, already exists: {frame['output']}")
+                results.append({"name": frame["name"], "status": "skipped", "path": frame["output"]})
+            else:
+                pending.append(frame)
+        frame_files = pending
+
+    if not frame_files:
+        return results
 
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
+    print(f"\n=== Upscaling {len(frame_files)} frames to 2K in parallel (max {max_workers} workers) ===\n")
 
-    return results
+    return results + asyncio.run(_upscale_all(client, frame_files, max_workers, downscale))
 
 
 def main():
@@ -165,6 +220,10 @@ def main():
     parser.add_argument("--output", required=True, help="Output directory for upscaled frames")
     parser.add_argument("--parallel", type=int, default=9,
                        help="Max parallel tasks (default: 9)")
+    parser.add_argument("--force", action="store_true",
+                       help="Re-upscale frames even if the output file already exists")
+    parser.add_argument("--no-downscale-input", action="store_true",
+                       help="Send input frames at full resolution (default: shrink to 1024px)")
     args = parser.parse_args()
 
     api_key = os.environ.get("GEMINI_API_KEY")
@@ -179,9 +238,10 @@ def main():
     print("Initializing Gemini client...")
     client = genai.Client(api_key=api_key)
 
-    results = upscale_frames_parallel(client, args.input, args.output, args.parallel)
+    results = upscale_frames_parallel(client, args.input, args.output, args.parallel,
+                                      args.force, not args.no_downscale_input)
 
-    success_count = sum(1 for r in results if r.get("status") == "success")
+    success_count = sum(1 for r in results if r.get("status") in ("success", "skipped"))
     total = len(results)
 
     print(f"\n{success_count}/{total} frames upscaled successfully")
@@ -10,8 +10,12 @@ import json
 import os
 import re
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from stat import S_ISREG
 
 # Windows CMD 中文编码修复
 if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
@@ -20,6 +24,41 @@ if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
 
 import yaml
 
+# orjson 可选：有则用 C 实现读写注册表，否则回退标准库 json
+try:
+    import orjson
+
+    def _dump(obj, path: str):
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+    _loads = orjson.loads
+except ImportError:
+    def _dump(obj, path: str):
+        # 直接流式写入文件，不在内存中拼出整个 JSON 字符串
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
+    _loads = json.loads
+
+# pyahocorasick 可选：有则一次扫描匹配全部分类关键词
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# libyaml 的 C 实现快得多，未编译 libyaml 时回退纯 Python 版本
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# ── 预编译正则 ──────────────────────────────────────────────────
+_FRONTMATTER_RE = re.compile(r"^---\n(.*?)\n---", re.DOTALL)
+_CHINESE_RE = re.compile(r"[\u4e00-\u9fff]")
+_HYPHEN_CASE_RE = re.compile(r"^[a-z0-9-]+$")
+_NPM_VERSION_RE = re.compile(r"@(latest|next|[\d.]+.*)$")
+
+# frontmatter 通常在前 1KB 内，先读 8192 个字符
+FRONTMATTER_READ_SIZE = 8192
+
 # ── 分类关键词映射 ──────────────────────────────────────────────
 CATEGORY_KEYWORDS = {
     "音视频处理": ["audio", "video", "transcri", "download", "下载", "音频", "视频",
@@ -39,6 +78,29 @@ CATEGORY_KEYWORDS = {
     "其他": []
 }
 
+# 预先去掉空关键词分类；按关键词数量降序排列（同数量保持原顺序），
+# 并记录每个位置之后各分类可能达到的最高分，用于提前结束
+_CATEGORY_RULES = tuple(sorted(
+    ((i, cat, tuple(kws)) for i, (cat, kws) in enumerate(CATEGORY_KEYWORDS.items()) if kws),
+    key=lambda rule: -len(rule[2]),
+))
+_REMAINING_MAX = tuple(len(rule[2]) for rule in _CATEGORY_RULES[1:]) + (0,)
+
+
+def _build_keyword_automaton():
+    """把所有分类关键词建成一个 Aho-Corasick 自动机，值为关键词本身"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for _, _, keywords in _CATEGORY_RULES:
+        for kw in keywords:
+            automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
 # ── MCP 包名到 GitHub 的已知映射 ─────────────────────────────────
 KNOWN_MCP_GITHUB = {
     "@playwright/mcp": "https://github.com/microsoft/playwright-mcp",
@@ -53,6 +115,12 @@ KNOWN_SKILL_SOURCES = {
     "skill-creator": "https://github.com/anthropics/skills/tree/main/skills/skill-creator",
 }
 
+# 扫描以 I/O 为主，线程数可以远多于 CPU 核数
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# 本次扫描的时间戳，由 main() 统一生成，所有条目共用
+SCAN_TIMESTAMP = ""
+
 # ── 用户配置（从 .env 加载）────────────────────────────────────
 MY_GITHUB_REPO = ""
 PROJECT_SCAN_DIRS = []
@@ -80,28 +148,47 @@ def load_env_config(env_path: Path = None):
 
 # ── 工具函数 ────────────────────────────────────────────────────
 
+def pick_skill_md(names) -> str | None:
+    """从文件名列表中选出 SKILL.md（不区分大小写，优先标准写法）"""
+    found = None
+    for name in names:
+        if name == "SKILL.md":
+            return name
+        if found is None and name.lower() == "skill.md":
+            found = name
+    return found
+
+
 def find_skill_md(skill_dir: Path):
-    """查找 SKILL.md（兼容大小写）"""
-    for name in ["SKILL.md", "skill.md", "Skill.md"]:
-        p = skill_dir / name
-        if p.exists():
-            return p
-    return None
+    """查找 SKILL.md（兼容大小写），一次目录枚举代替逐个探测"""
+    try:
+        with os.scandir(skill_dir) as it:
+            name = pick_skill_md(e.name for e in it if e.is_file())
+    except OSError:
+        return None
+    return skill_dir / name if name else None
 
 
 def parse_frontmatter(skill_md_path: Path):
-    """解析 YAML frontmatter"""
+    """解析 YAML frontmatter（只读取文件开头部分）"""
     try:
-        content = skill_md_path.read_text(encoding="utf-8", errors="replace")
+        # 文本模式读取，与 read_text 一样把 CRLF/CR 统一为 \n（Windows 换行的 SKILL.md）
+        with skill_md_path.open("r", encoding="utf-8", errors="replace") as f:
+            content = f.read(FRONTMATTER_READ_SIZE)
+            if not content.startswith("---\n"):
+                return None
+            # 结束标记不在已读部分时才读取剩余内容
+            if content.find("\n---", 4) == -1:
+                content += f.read()
     except Exception:
         return None
 
-    match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
+    match = _FRONTMATTER_RE.match(content)
     if not match:
         return None
 
     try:
-        fm = yaml.safe_load(match.group(1))
+        fm = yaml.load(match.group(1), Loader=YAML_LOADER)
         if isinstance(fm, dict):
             return fm
     except yaml.YAMLError:
@@ -112,19 +199,43 @@ def parse_frontmatter(skill_md_path: Path):
 EXCLUDE_PATTERNS = {"data", "__pycache__", ".env", ".git"}
 
 
-def calc_size(path: Path) -> str:
-    """计算目录总大小，排除运行时文件，返回人类可读格式"""
-    total = 0
-    try:
-        for f in path.rglob("*"):
-            # 跳过排除的目录/文件
-            if any(part in EXCLUDE_PATTERNS for part in f.parts):
-                continue
-            if f.is_file():
-                total += f.stat().st_size
-    except OSError:
-        pass
+def _walk_stats(path: Path, exclude: set = EXCLUDE_PATTERNS) -> tuple[int, float, int]:
+    """单次遍历目录，返回 (总大小, 最新修改时间, 文件数)
 
+    exclude 中的运行时目录/文件直接跳过，不再深入遍历。
+    """
+    total = 0
+    latest = 0.0
+    count = 0
+    stack = [str(path)]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name in exclude:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if not S_ISREG(st.st_mode):
+                    continue
+                total += st.st_size
+                count += 1
+                if st.st_mtime > latest:
+                    latest = st.st_mtime
+    return total, latest, count
+
+
+def format_size(total: int) -> str:
+    """字节数转人类可读格式"""
     if total < 1024:
         return f"{total} B"
     elif total < 1024 * 1024:
@@ -133,21 +244,26 @@ def calc_size(path: Path) -> str:
         return f"{total / (1024 * 1024):.1f} MB"
 
 
+def format_date(mtime: float) -> str:
+    """时间戳转日期，无文件时用本次扫描的日期"""
+    if mtime <= 0:
+        return scan_timestamp()[:10]
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d")
+
+
+def scan_timestamp() -> str:
+    """返回本次扫描时间戳；未在 main() 中设置时取当前时间"""
+    return SCAN_TIMESTAMP or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def calc_size(path: Path) -> str:
+    """计算目录总大小，排除运行时文件，返回人类可读格式"""
+    return format_size(_walk_stats(path)[0])
+
+
 def get_last_modified(path: Path) -> str:
     """获取目录中最新文件的修改日期"""
-    latest = 0
-    try:
-        for f in path.rglob("*"):
-            if f.is_file():
-                mtime = f.stat().st_mtime
-                if mtime > latest:
-                    latest = mtime
-    except OSError:
-        pass
-
-    if latest <= 0:
-        return datetime.now().strftime("%Y-%m-%d")
-    return datetime.fromtimestamp(latest).strftime("%Y-%m-%d")
+    return format_date(_walk_stats(path)[1])
 
 
 def auto_categorize(name: str, description: str) -> str:
@@ -155,29 +271,61 @@ def auto_categorize(name: str, description: str) -> str:
     text = f"{name} {description}".lower()
     best_cat = "其他"
     best_score = 0
-
-    for cat, keywords in CATEGORY_KEYWORDS.items():
-        if not keywords:
-            continue
-        score = sum(1 for kw in keywords if kw in text)
-        if score > best_score:
+    best_index = len(CATEGORY_KEYWORDS)
+
+    if _KEYWORD_AUTOMATON is not None:
+        # 单次线性扫描得到出现过的关键词，每个关键词只计一次，与 kw in text 一致
+        matched = {kw for _, kw in _KEYWORD_AUTOMATON.iter(text)}
+        if not matched:
+            return best_cat
+        for index, cat, keywords in _CATEGORY_RULES:
+            score = sum(kw in matched for kw in keywords)
+            if score > best_score or (score == best_score and score and index < best_index):
+                best_score = score
+                best_cat = cat
+                best_index = index
+        return best_cat
+
+    # 关键词含前缀（transcri、analy）和短词（ai、ml），必须按子串匹配，不能分词后查集合
+    for (index, cat, keywords), remaining_max in zip(_CATEGORY_RULES, _REMAINING_MAX):
+        score = sum(kw in text for kw in keywords)
+        # 同分时取 CATEGORY_KEYWORDS 中靠前的分类，与原有结果一致
+        if score > best_score or (score == best_score and score and index < best_index):
             best_score = score
             best_cat = cat
+            best_index = index
+        if best_score > remaining_max:
+            break
 
     return best_cat
 
 
 def is_chinese(text: str) -> bool:
     """检测文本是否包含中文"""
-    return bool(re.search(r"[\u4e00-\u9fff]", text))
+    # 纯 ASCII 字符串 CPython 内部有标记，isascii() 为 O(1)，可直接跳过正则
+    return not text.isascii() and _CHINESE_RE.search(text) is not None
+
+
+def build_searchable(*fields) -> str:
+    """拼接扫描时确定的字段并 casefold，供 search 直接做子串匹配"""
+    return " ".join(str(f) for f in fields).casefold()
 
 
-def health_check(skill_dir: Path) -> dict:
-    """对单个技能进行健康检查"""
+# 健康检查：允许的 frontmatter 键、不应出现在技能目录中的文件
+ALLOWED_FRONTMATTER_KEYS = frozenset({"name", "description", "license", "allowed-tools", "metadata"})
+EXTRA_FILES = ("README.md", "CHANGELOG.md", "INSTALLATION_GUIDE.md")
+
+
+def health_check(skill_dir: Path, md_path: Path = None, fm: dict = None) -> dict:
+    """对单个技能进行健康检查
+
+    md_path / fm 可由调用方传入已解析的结果，避免重复读取和解析 SKILL.md。
+    """
     issues = []
 
     # 1. SKILL.md 存在性
-    md_path = find_skill_md(skill_dir)
+    if md_path is None:
+        md_path = find_skill_md(skill_dir)
     if md_path is None:
         return {"status": "error", "issues": [{"level": "error", "msg": "SKILL.md 不存在"}]}
 
@@ -186,7 +334,8 @@ def health_check(skill_dir: Path) -> dict:
         issues.append({"level": "warning", "msg": f"文件名应为 SKILL.md，当前为 {md_path.name}"})
 
     # 2. Frontmatter 解析
-    fm = parse_frontmatter(md_path)
+    if fm is None:
+        fm = parse_frontmatter(md_path)
     if fm is None:
         return {"status": "error", "issues": [{"level": "error", "msg": "YAML frontmatter 无法解析"}]}
 
@@ -195,7 +344,7 @@ def health_check(skill_dir: Path) -> dict:
         issues.append({"level": "error", "msg": "缺少 name 字段"})
     else:
         name = str(fm["name"]).strip()
-        if not re.match(r"^[a-z0-9-]+$", name):
+        if not _HYPHEN_CASE_RE.match(name):
             issues.append({"level": "error", "msg": f"name '{name}' 不符合 hyphen-case 规范"})
         if name != skill_dir.name:
             issues.append({"level": "warning", "msg": f"name '{name}' 与目录名 '{skill_dir.name}' 不一致"})
@@ -208,13 +357,12 @@ def health_check(skill_dir: Path) -> dict:
             issues.append({"level": "warning", "msg": f"description 过短（{len(desc)} 字符）"})
 
     # 4. 多余的 frontmatter 键
-    ALLOWED = {"name", "description", "license", "allowed-tools", "metadata"}
-    extra = set(fm.keys()) - ALLOWED
+    extra = fm.keys() - ALLOWED_FRONTMATTER_KEYS
     if extra:
         issues.append({"level": "warning", "msg": f"非标准 frontmatter 键: {', '.join(extra)}"})
 
     # 5. 多余文件
-    for bad_file in ["README.md", "CHANGELOG.md", "INSTALLATION_GUIDE.md"]:
+    for bad_file in EXTRA_FILES:
         if (skill_dir / bad_file).exists():
             issues.append({"level": "warning", "msg": f"存在多余文件: {bad_file}"})
 
@@ -232,18 +380,32 @@ def health_check(skill_dir: Path) -> dict:
 
 # ── 技能扫描 ────────────────────────────────────────────────────
 
-def scan_single_skill(skill_dir: Path, scope: str = "global", project: str = "") -> dict | None:
-    """扫描单个技能，返回注册表条目"""
+def scan_single_skill(skill_dir: Path, scope: str = "global", project: str = "",
+                      previous: dict = None) -> dict | None:
+    """扫描单个技能，返回注册表条目
+
+    previous 为上次扫描的同路径条目；目录指纹（最新修改时间、文件数、总大小）
+    未变化时直接沿用其解析结果，跳过 frontmatter 解析和健康检查。
+    """
     md_path = find_skill_md(skill_dir)
     if md_path is None:
         return None
 
-    fm = parse_frontmatter(md_path)
-    if fm is None:
-        return None
+    # 一次遍历同时得到大小、最新修改时间和文件数
+    total_size, latest_mtime, file_count = _walk_stats(skill_dir)
+    fingerprint = [latest_mtime, file_count, total_size]
 
-    name = fm.get("name", skill_dir.name) if fm else skill_dir.name
-    desc = str(fm.get("description", "")).strip() if fm else ""
+    if previous and previous.get("_fingerprint") == fingerprint and "health" in previous:
+        name = previous["name"]
+        desc = previous.get("description", "")
+        health = previous["health"]
+    else:
+        fm = parse_frontmatter(md_path)
+        if fm is None:
+            return None
+        name = fm.get("name", skill_dir.name) if fm else skill_dir.name
+        desc = str(fm.get("description", "")).strip() if fm else ""
+        health = health_check(skill_dir, md_path, fm)
 
     # 中文描述处理
     if is_chinese(desc):
@@ -256,36 +418,48 @@ def scan_single_skill(skill_dir: Path, scope: str = "global", project: str = "")
     source_url = KNOWN_SKILL_SOURCES.get(name, "")
     my_url = "" if is_downloaded else (f"{MY_GITHUB_REPO}/tree/main/{name}" if MY_GITHUB_REPO else "")
 
+    category = auto_categorize(name, desc)
+
     return {
         "name": name,
         "description": desc,
         "description_zh": desc_zh,
         "path": str(skill_dir),
-        "last_modified": get_last_modified(skill_dir),
-        "category": auto_categorize(name, desc),
-        "size": calc_size(skill_dir),
+        "last_modified": format_date(latest_mtime),
+        "category": category,
+        "size": format_size(total_size),
         "github_source_url": source_url,
         "github_my_url": my_url,
-        "health": health_check(skill_dir),
+        "health": health,
         "scope": scope,
         "project": project,
         "sync_status": "pending",
-        "scanned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "scanned_at": scan_timestamp(),
+        # description_zh 可能在扫描后被翻译，不放入预计算的搜索文本
+        "_searchable": build_searchable(name, desc, category),
+        "_fingerprint": fingerprint,
     }
 
 
-def scan_all_skills(skills_dir: Path) -> dict:
+def previous_entries(registry: dict) -> dict:
+    """按路径索引已有注册表条目，供增量扫描复用"""
+    return {e["path"]: e for e in registry.get("skills", {}).values() if e.get("path")}
+
+
+def scan_all_skills(skills_dir: Path, previous: dict = None) -> dict:
     """扫描所有技能"""
     skills = {}
     if not skills_dir.exists():
         return skills
+    previous = previous or {}
 
-    for item in sorted(skills_dir.iterdir()):
-        if not item.is_dir():
-            continue
-        entry = scan_single_skill(item)
-        if entry:
-            skills[entry["name"]] = entry
+    # DirEntry.is_dir() 通常直接取 readdir 返回的类型，无需逐个 stat
+    with os.scandir(skills_dir) as it:
+        dirs = sorted(Path(e.path) for e in it if e.is_dir())
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        for entry in executor.map(lambda d: scan_single_skill(d, previous=previous.get(str(d))), dirs):
+            if entry:
+                skills[entry["name"]] = entry
 
     return skills
 
@@ -305,11 +479,13 @@ def get_project_name(skill_md_path: Path, scan_root: Path) -> str:
         return skill_md_path.parent.name
 
 
-def scan_project_skills(project_dirs: list[str], global_skills_dir: str = "") -> dict:
+def scan_project_skills(project_dirs: list[str], global_skills_dir: str = "",
+                        previous: dict = None) -> dict:
     """递归扫描项目目录中的 skill，返回 {registry_key: entry}"""
     skills = {}
-    seen_names = {}  # name -> [registry_keys] 用于检测重复
+    previous = previous or {}
     seen_paths = set()  # 避免同一目录重复扫描
+    candidates = []  # (skill_dir, project_name)
 
     for dir_str in project_dirs:
         scan_root = Path(dir_str)
@@ -322,11 +498,7 @@ def scan_project_skills(project_dirs: list[str], global_skills_dir: str = "") ->
             dirnames[:] = [d for d in dirnames if d not in PROJECT_EXCLUDE_DIRS]
 
             # 检查当前目录是否有 SKILL.md
-            md_name = None
-            for candidate in ["SKILL.md", "skill.md", "Skill.md"]:
-                if candidate in filenames:
-                    md_name = candidate
-                    break
+            md_name = pick_skill_md(filenames)
             if md_name is None:
                 continue
 
@@ -342,34 +514,23 @@ def scan_project_skills(project_dirs: list[str], global_skills_dir: str = "") ->
                 continue
             seen_paths.add(dir_key)
 
-            project_name = get_project_name(skill_dir / md_name, scan_root)
-
-            entry = scan_single_skill(skill_dir, scope="project", project=project_name)
-            if entry is None:
-                continue
-
-            name = entry["name"]
-
-            # 构建 registry key：同名 skill 用 name@project 区分
-            if name in seen_names:
-                # 已有同名的，之前的也需要加后缀（如果还没加）
-                for old_key in list(seen_names[name]):
-                    if old_key == name and old_key in skills:
-                        old_entry = skills.pop(old_key)
-                        new_key = f"{name}@{old_entry['project']}"
-                        skills[new_key] = old_entry
-                        seen_names[name].remove(old_key)
-                        seen_names[name].append(new_key)
-                reg_key = f"{name}@{project_name}"
-            else:
-                reg_key = name
-                seen_names[name] = []
-
-            # 避免重复 key
-            if reg_key in skills:
-                continue
-
-            seen_names[name].append(reg_key)
+            candidates.append((skill_dir, get_project_name(skill_dir / md_name, scan_root)))
+
+    # 遍历完成后并行扫描候选目录，结果按发现顺序处理
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        entries = list(executor.map(
+            lambda c: scan_single_skill(c[0], scope="project", project=c[1],
+                                        previous=previous.get(str(c[0]))),
+            candidates))
+
+    # 同名 skill 统一用 name@project 区分
+    collected = [(project_name, entry) for (_, project_name), entry in zip(candidates, entries) if entry]
+    counts = Counter(entry["name"] for _, entry in collected)
+    for project_name, entry in collected:
+        name = entry["name"]
+        reg_key = f"{name}@{project_name}" if counts[name] > 1 else name
+        # 避免重复 key
+        if reg_key not in skills:
             skills[reg_key] = entry
 
     return skills
@@ -377,28 +538,38 @@ def scan_project_skills(project_dirs: list[str], global_skills_dir: str = "") ->
 
 # ── MCP 扫描 ────────────────────────────────────────────────────
 
+# MCP 命令中不是包名的参数
+_NPM_SKIP_ARGS = frozenset({"/c", "cmd", "npx", "-y", "node"})
+
+
 def extract_npm_package(args: list) -> str:
     """从 MCP 命令参数中提取 npm 包名"""
+    return _extract_npm_package(tuple(args))
+
+
+@lru_cache(maxsize=256)
+def _extract_npm_package(args: tuple) -> str:
     for arg in args:
         # 跳过 cmd flags
-        if arg in ("/c", "cmd", "npx", "-y", "node"):
+        if arg in _NPM_SKIP_ARGS:
             continue
         # 去掉 @latest 等版本后缀
-        pkg = re.sub(r"@(latest|next|[\d.]+.*)$", "", arg)
+        pkg = _NPM_VERSION_RE.sub("", arg)
         if pkg and not pkg.startswith("-"):
             return pkg
     return ""
 
 
+@lru_cache(maxsize=None)
 def guess_github_url(package_name: str) -> str:
     """根据 npm 包名猜测 GitHub 地址"""
     if package_name in KNOWN_MCP_GITHUB:
         return KNOWN_MCP_GITHUB[package_name]
     # npm scope 包: @scope/name -> 可能是 github.com/scope/name
     if package_name.startswith("@"):
-        parts = package_name.lstrip("@").split("/")
-        if len(parts) == 2:
-            return f"https://github.com/{parts[0]}/{parts[1]}"
+        scope, sep, pkg = package_name.lstrip("@").partition("/")
+        if sep and "/" not in pkg:
+            return f"https://github.com/{scope}/{pkg}"
     return ""
 
 
@@ -409,7 +580,7 @@ def scan_mcp_servers(mcp_settings_path: Path) -> dict:
         return servers
 
     try:
-        data = json.loads(mcp_settings_path.read_text(encoding="utf-8"))
+        data = _loads(mcp_settings_path.read_bytes())
     except (json.JSONDecodeError, OSError):
         return servers
 
@@ -425,16 +596,18 @@ def scan_mcp_servers(mcp_settings_path: Path) -> dict:
         # 构建完整命令字符串
         full_cmd = f"{cmd} {' '.join(args)}" if args else cmd
 
+        category = auto_categorize(name, npm_pkg)
         servers[name] = {
             "name": name,
             "npm_package": npm_pkg,
             "command": full_cmd,
             "env_vars": env_keys,
             "github_url": github_url,
-            "category": auto_categorize(name, npm_pkg),
+            "category": category,
             "description_zh": "",  # 由 Claude 填充
             "sync_status": "pending",
-            "scanned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "scanned_at": scan_timestamp(),
+            "_searchable": build_searchable(name, npm_pkg, category),
         }
 
     return servers
@@ -446,7 +619,7 @@ def load_registry(path: Path) -> dict:
     """加载已有注册表"""
     if path.exists():
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
+            return _loads(path.read_bytes())
         except (json.JSONDecodeError, OSError):
             pass
     return {
@@ -460,34 +633,39 @@ def load_registry(path: Path) -> dict:
 def save_registry(registry: dict, path: Path):
     """保存注册表"""
     path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    # 先写临时文件再原子替换，中途中断不会留下半截注册表
+    tmp = f"{path}.tmp"
+    _dump(registry, tmp)
+    os.replace(tmp, path)
+
+
+def _diff_key(entry: dict) -> tuple:
+    """参与变更检测的字段，整体做一次元组比较"""
+    return (entry.get("description"), entry.get("size"),
+            entry.get("last_modified"), entry.get("category"))
 
 
 def merge_skills(old_reg: dict, new_skills: dict) -> dict:
     """合并新扫描结果到现有注册表，新扫描值优先，仅在新值为空时保留旧值"""
     existing = old_reg.get("skills", {})
     for name, entry in new_skills.items():
-        if name in existing:
-            old = existing[name]
-            # GitHub URL: 新值优先，空时回退旧值
-            entry["github_source_url"] = entry.get("github_source_url", "") or old.get("github_source_url", "")
-            entry["github_my_url"] = entry.get("github_my_url", "") or old.get("github_my_url", "")
-            entry["feishu_record_id"] = old.get("feishu_record_id")
-            # 中文描述: 保留已翻译的（无 [需要翻译] 前缀），新扫描有中文则用新的
-            old_zh = old.get("description_zh", "")
-            if entry["description_zh"].startswith("[需要翻译]") and old_zh and not old_zh.startswith("[需要翻译]"):
-                entry["description_zh"] = old_zh
-            # 检测数据是否有变更
-            for key in ("description", "size", "last_modified", "category"):
-                if entry.get(key) != old.get(key):
-                    entry["sync_status"] = "modified"
-                    break
-            else:
-                entry["sync_status"] = old.get("sync_status", "pending")
-        else:
+        old = existing.get(name)
+        if old is None:
             entry["feishu_record_id"] = None
+            continue
+        # GitHub URL: 新值优先，空时回退旧值
+        entry["github_source_url"] = entry.get("github_source_url", "") or old.get("github_source_url", "")
+        entry["github_my_url"] = entry.get("github_my_url", "") or old.get("github_my_url", "")
+        entry["feishu_record_id"] = old.get("feishu_record_id")
+        # 中文描述: 保留已翻译的（无 [需要翻译] 前缀），新扫描有中文则用新的
+        old_zh = old.get("description_zh", "")
+        if entry["description_zh"].startswith("[需要翻译]") and old_zh and not old_zh.startswith("[需要翻译]"):
+            entry["description_zh"] = old_zh
+        # 检测数据是否有变更
+        if _diff_key(entry) != _diff_key(old):
+            entry["sync_status"] = "modified"
+        else:
+            entry["sync_status"] = old.get("sync_status", "pending")
     return new_skills
 
 
@@ -509,20 +687,33 @@ def merge_mcp(old_reg: dict, new_servers: dict) -> dict:
 
 # ── 搜索 ────────────────────────────────────────────────────────
 
+def _public(entry: dict) -> dict:
+    """去掉内部字段（下划线开头）"""
+    return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+
 def search(registry: dict, keyword: str) -> dict:
-    """搜索技能和 MCP 服务器"""
-    kw = keyword.lower()
+    """搜索技能和 MCP 服务器
+
+    name/description/category 使用扫描时预计算的 _searchable；
+    description_zh 可能在扫描后被翻译，单独匹配；
+    注册表键（重名项目技能为 name@project）也单独匹配。
+    """
+    kw = keyword.casefold()
     results = {"skills": {}, "mcp_servers": {}}
 
     for name, entry in registry.get("skills", {}).items():
-        searchable = f"{name} {entry.get('description', '')} {entry.get('description_zh', '')} {entry.get('category', '')}".lower()
-        if kw in searchable:
-            results["skills"][name] = entry
+        blob = entry.get("_searchable") or \
+            build_searchable(name, entry.get("description", ""), entry.get("category", ""))
+        if (kw in blob or kw in name.casefold()
+                or kw in entry.get("description_zh", "").casefold()):
+            results["skills"][name] = _public(entry)
 
     for name, entry in registry.get("mcp_servers", {}).items():
-        searchable = f"{name} {entry.get('npm_package', '')} {entry.get('description_zh', '')} {entry.get('category', '')}".lower()
-        if kw in searchable:
-            results["mcp_servers"][name] = entry
+        blob = entry.get("_searchable") or \
+            build_searchable(name, entry.get("npm_package", ""), entry.get("category", ""))
+        if kw in blob or kw in entry.get("description_zh", "").casefold():
+            results["mcp_servers"][name] = _public(entry)
 
     return results
 
@@ -576,6 +767,7 @@ def print_summary(registry: dict):
 # ── 主函数 ──────────────────────────────────────────────────────
 
 def main():
+    global SCAN_TIMESTAMP
     parser = argparse.ArgumentParser(description="Skill & MCP Scanner")
     parser.add_argument("--skills-dir", default=r"C:\Users\fubai\.claude\skills",
                         help="技能目录路径")
@@ -592,6 +784,7 @@ def main():
 
     # 加载 .env 中的配置
     load_env_config(Path(args.env))
+    SCAN_TIMESTAMP = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     output_path = Path(args.output)
     registry = load_registry(output_path)
@@ -610,22 +803,23 @@ def main():
         if not skill_path.exists():
             print(f"Error: 技能目录不存在: {skill_path}", file=sys.stderr)
             sys.exit(1)
-        entry = scan_single_skill(skill_path)
+        entry = scan_single_skill(skill_path, previous=previous_entries(registry).get(str(skill_path)))
         if entry:
             new_skills = merge_skills(registry, {entry["name"]: entry})
             registry["skills"].update(new_skills)
             print(f"已更新技能: {entry['name']}")
     else:
         # 全量扫描：全局 + 项目级
-        new_skills = scan_all_skills(skills_dir)
+        previous = previous_entries(registry)
+        new_skills = scan_all_skills(skills_dir, previous)
 
         # 项目级扫描
         if PROJECT_SCAN_DIRS:
-            project_skills = scan_project_skills(PROJECT_SCAN_DIRS, str(skills_dir))
+            project_skills = scan_project_skills(PROJECT_SCAN_DIRS, str(skills_dir), previous)
             new_skills.update(project_skills)
 
         registry["skills"] = merge_skills(registry, new_skills)
-        registry["last_full_scan"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        registry["last_full_scan"] = SCAN_TIMESTAMP
 
     # MCP 扫描（始终执行）
     new_mcps = scan_mcp_servers(Path(args.mcp_settings))
@@ -6,11 +6,15 @@
 """
 
 import argparse
+import hashlib
 import json
 import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from threading import Lock
 
 # Windows CMD 中文编码修复
 if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
@@ -18,9 +22,73 @@ if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
     sys.stderr.reconfigure(encoding="utf-8")
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson 可选：有则用 C 实现编解码请求体和 JSON 文件，否则回退标准库 json
+try:
+    import orjson
+
+    _body_dumps = orjson.dumps
+
+    def _dump(obj, path):
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            f.flush()
+            os.fsync(f.fileno())
+
+    _loads = orjson.loads
+except ImportError:
+    def _body_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _dump(obj, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+    _loads = json.loads
 
 BASE_URL = "https://open.feishu.cn/open-apis"
 
+class FeishuRetry(Retry):
+    """幂等方法按 status_forcelist 重试；POST 只在 429 时重试
+
+    429 表示请求被限流、未被处理，重试不会重复创建记录；5xx 时 POST 可能已生效，不重试。
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() == "POST" and status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+# 所有请求共用一个 Session，复用到 open.feishu.cn 的 keep-alive 连接
+# 限流时按响应的 Retry-After 等待后重试，不中断整次同步
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=FeishuRetry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                            respect_retry_after_header=True),
+))
+
+# token 缓存在配置文件中，距过期不足该秒数时提前刷新
+TOKEN_REFRESH_MARGIN = 300
+# 飞书 token 缺失/无效/过期的错误码
+TOKEN_INVALID_CODES = {99991661, 99991663, 99991677}
+
+# 客户端限速，略低于飞书多维表格 20 QPS 的接口上限
+REQUESTS_PER_SECOND = 18
+
+# 批量创建/更新接口单次最多提交的记录数
+BATCH_SIZE = 500
+
+# .env 中的 KEY=VALUE 行（跳过空行和 # 注释），整个文件一次匹配
+_ENV_LINE_RE = re.compile(r"^[ \t]*([^#\s=][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t]*$", re.M)
+
 # ── 技能表字段定义 ──────────────────────────────────────────────
 SKILL_TABLE_NAME = "技能列表"
 SKILL_FIELDS = [
@@ -63,13 +131,8 @@ def load_env(env_path: Path) -> tuple[str, str]:
         print("  FEISHU_APP_SECRET=你的应用密钥", file=sys.stderr)
         sys.exit(1)
 
-    env = {}
-    with open(env_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                env[key.strip()] = value.strip().strip('"').strip("'")
+    env = {key: value.strip('"').strip("'")
+           for key, value in _ENV_LINE_RE.findall(env_path.read_text(encoding="utf-8"))}
 
     app_id = env.get("FEISHU_APP_ID", "")
     app_secret = env.get("FEISHU_APP_SECRET", "")
@@ -80,28 +143,81 @@ def load_env(env_path: Path) -> tuple[str, str]:
     return app_id, app_secret
 
 
-def get_token(app_id: str, app_secret: str) -> str:
-    """获取飞书 tenant_access_token"""
+def request_token(app_id: str, app_secret: str) -> tuple[str, int]:
+    """获取飞书 tenant_access_token，返回 (token, 有效秒数)"""
     url = f"{BASE_URL}/auth/v3/tenant_access_token/internal"
-    resp = requests.post(url, json={"app_id": app_id, "app_secret": app_secret}, timeout=10)
+    resp = SESSION.post(url, json={"app_id": app_id, "app_secret": app_secret}, timeout=10)
     resp.raise_for_status()
     data = resp.json()
     if data.get("code") != 0:
         print(f"Error: 获取 token 失败: {data.get('msg')}", file=sys.stderr)
         sys.exit(1)
-    return data["tenant_access_token"]
+    return data["tenant_access_token"], int(data.get("expire", 0))
+
+
+def get_token_cached(app_id: str, app_secret: str, config: dict, config_path: Path,
+                     force: bool = False) -> str:
+    """优先使用配置中缓存的 token，距过期不足 TOKEN_REFRESH_MARGIN 秒时重新获取"""
+    if (not force and config.get("token_app_id") == app_id
+            and time.time() < config.get("token_expire_ts", 0) - TOKEN_REFRESH_MARGIN):
+        return config["tenant_access_token"]
+
+    token, expire = request_token(app_id, app_secret)
+    config["tenant_access_token"] = token
+    config["token_app_id"] = app_id
+    config["token_expire_ts"] = time.time() + expire
+    save_config(config, config_path)
+    return token
+
+
+class TokenBucket:
+    """令牌桶限速：允许短时突发，长期速率不超过 rps"""
+
+    def __init__(self, rps: float):
+        self.rps = rps
+        self.capacity = rps
+        self.tokens = rps
+        self.last = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        """取一个令牌，桶空时阻塞到补足为止"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rps)
+            self.last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rps if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+BUCKET = TokenBucket(REQUESTS_PER_SECOND)
+
+
+class TokenInvalidError(Exception):
+    """tenant_access_token 无效或已过期"""
 
 
 def api_request(method: str, endpoint: str, token: str, **kwargs) -> dict:
     """统一 API 请求，自带认证和错误处理"""
     url = f"{BASE_URL}{endpoint}" if endpoint.startswith("/") else endpoint
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    resp = requests.request(method, url, headers=headers, timeout=30, **kwargs)
+    # Content-Type 已在 SESSION 上设置；token 可能在运行中刷新，Authorization 按次传入
+    headers = {"Authorization": f"Bearer {token}"}
+    if "json" in kwargs:
+        kwargs["data"] = _body_dumps(kwargs.pop("json"))
+    BUCKET.acquire()
+    resp = SESSION.request(method, url, headers=headers, timeout=30, **kwargs)
+    try:
+        data = _loads(resp.content)
+    except ValueError:
+        data = None
+    # token 失效时飞书返回 4xx + 业务错误码，需在 raise_for_status 之前识别
+    if isinstance(data, dict) and data.get("code") in TOKEN_INVALID_CODES:
+        raise TokenInvalidError(f"token 无效 [{data.get('code')}]")
     resp.raise_for_status()
-    data = resp.json()
+    if not isinstance(data, dict):
+        raise Exception(f"API 响应无法解析: {resp.text[:200]}")
     if data.get("code") != 0:
         raise Exception(f"API 错误 [{data.get('code')}]: {data.get('msg')}")
     return data.get("data", {})
@@ -113,7 +229,7 @@ def load_config(config_path: Path) -> dict:
     """加载飞书配置"""
     if config_path.exists():
         try:
-            return json.loads(config_path.read_text(encoding="utf-8"))
+            return _loads(config_path.read_bytes())
         except (json.JSONDecodeError, OSError):
             pass
     return {
@@ -123,13 +239,27 @@ def load_config(config_path: Path) -> dict:
         "bitable_url": None,
         "skill_record_map": {},
         "mcp_record_map": {},
+        "skill_field_hashes": {},
+        "mcp_field_hashes": {},
+        "schema_version": None,
         "last_sync": None,
+        "last_sync_ts": 0,
+        "tenant_access_token": None,
+        "token_app_id": None,
+        "token_expire_ts": 0,
     }
 
 
+def _dump_atomic(obj, path: Path):
+    """先写入并落盘临时文件再原子替换，中途中断不会留下截断的 JSON"""
+    tmp = f"{path}.tmp"
+    _dump(obj, tmp)
+    os.replace(tmp, path)
+
+
 def save_config(config: dict, config_path: Path):
     config_path.parent.mkdir(parents=True, exist_ok=True)
-    config_path.write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+    _dump_atomic(config, config_path)
 
 
 # ── 多维表格操作 ────────────────────────────────────────────────
@@ -187,11 +317,12 @@ def add_field(token: str, app_token: str, table_id: str, field_name: str, field_
                 json={"field_name": field_name, "type": field_type})
 
 
-def ensure_fields(token: str, app_token: str, table_id: str, expected_fields: list):
-    """确保表中存在所有期望字段，缺失的自动添加"""
+def ensure_fields(token: str, app_token: str, table_id: str, expected_fields: list) -> bool:
+    """确保表中存在所有期望字段，缺失的自动添加；全部就绪时返回 True"""
     existing = list_fields(token, app_token, table_id)
     existing_names = {f.get("field_name") for f in existing}
 
+    ok = True
     for field_def in expected_fields:
         fname = field_def["field_name"]
         if fname not in existing_names:
@@ -200,6 +331,14 @@ def ensure_fields(token: str, app_token: str, table_id: str, expected_fields: li
                 add_field(token, app_token, table_id, fname, field_def["type"])
             except Exception as e:
                 print(f"  添加字段失败 [{fname}]: {e}", file=sys.stderr)
+                ok = False
+    return ok
+
+
+def schema_fingerprint(config: dict) -> str:
+    """字段定义与两张表 ID 的摘要，任一变化都需要重新检查字段"""
+    payload = repr((SKILL_FIELDS, MCP_FIELDS, config.get("skill_table_id"), config.get("mcp_table_id")))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
 
 
 def ensure_tables(token: str, config: dict, config_path: Path) -> dict:
@@ -214,9 +353,11 @@ def ensure_tables(token: str, config: dict, config_path: Path) -> dict:
         config["bitable_url"] = url
         save_config(config, config_path)
 
-    # 验证 app_token 可用并获取已有表
+    # 验证 app_token 可用并获取已有表；token 失效不代表 app_token 失效，交给调用方刷新
     try:
         existing_tables = list_tables(token, app_token)
+    except TokenInvalidError:
+        raise
     except Exception:
         print("  app_token 失效，重新创建...", file=sys.stderr)
         config["app_token"] = None
@@ -224,6 +365,8 @@ def ensure_tables(token: str, config: dict, config_path: Path) -> dict:
         config["mcp_table_id"] = None
         config["skill_record_map"] = {}
         config["mcp_record_map"] = {}
+        config["skill_field_hashes"] = {}
+        config["mcp_field_hashes"] = {}
         return ensure_tables(token, config, config_path)
 
     changed = False
@@ -237,7 +380,6 @@ def ensure_tables(token: str, config: dict, config_path: Path) -> dict:
         else:
             print("  创建技能表...")
             config["skill_table_id"] = create_table(token, app_token, SKILL_TABLE_NAME, SKILL_FIELDS)
-            time.sleep(0.5)
         changed = True
 
     # MCP 表：同上
@@ -254,35 +396,52 @@ def ensure_tables(token: str, config: dict, config_path: Path) -> dict:
     if changed:
         save_config(config, config_path)
 
+    # 字段定义和表都没变时上次已检查过，跳过两次 list_fields
+    schema = schema_fingerprint(config)
+    if config.get("schema_version") == schema:
+        return config
+
     # 检查字段完整性，自动添加缺失字段
-    ensure_fields(token, app_token, config["skill_table_id"], SKILL_FIELDS)
-    ensure_fields(token, app_token, config["mcp_table_id"], MCP_FIELDS)
+    # 两张表并行检查；同一张表内的字段仍逐个添加，飞书不支持对同一表并发写入
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(ensure_fields, token, app_token, config["skill_table_id"], SKILL_FIELDS),
+            executor.submit(ensure_fields, token, app_token, config["mcp_table_id"], MCP_FIELDS),
+        ]
+        results = [future.result() for future in futures]
+
+    if all(results):
+        config["schema_version"] = schema
+        save_config(config, config_path)
 
     return config
 
 
 # ── 记录操作 ────────────────────────────────────────────────────
 
-def list_records(token: str, app_token: str, table_id: str) -> list:
-    """获取表中所有记录"""
-    all_items = []
+def iter_records(token: str, app_token: str, table_id: str, field_names: list = None):
+    """逐页获取表中记录并逐条产出；field_names 限定只返回这些字段"""
     page_token = None
 
     while True:
         params = {"page_size": 500}
         if page_token:
             params["page_token"] = page_token
+        if field_names:
+            params["field_names"] = json.dumps(field_names, ensure_ascii=False)
 
         data = api_request("GET", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records",
                            token, params=params)
-        items = data.get("items", [])
-        all_items.extend(items)
+        yield from data.get("items") or []
 
         if not data.get("has_more"):
             break
         page_token = data.get("page_token")
 
-    return all_items
+
+def list_records(token: str, app_token: str, table_id: str, field_names: list = None) -> list:
+    """获取表中所有记录"""
+    return list(iter_records(token, app_token, table_id, field_names))
 
 
 def batch_create(token: str, app_token: str, table_id: str, records: list[dict]) -> list[str]:
@@ -291,20 +450,44 @@ def batch_create(token: str, app_token: str, table_id: str, records: list[dict])
         return []
 
     record_ids = []
-    # 每批最多 500 条
-    for i in range(0, len(records), 500):
-        batch = records[i:i + 500]
+    for i in range(0, len(records), BATCH_SIZE):
+        batch = records[i:i + BATCH_SIZE]
         data = api_request("POST",
                            f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create",
                            token, json={"records": [{"fields": r} for r in batch]})
         for item in data.get("records", []):
             record_ids.append(item.get("record_id", ""))
-        if i + 500 < len(records):
-            time.sleep(0.5)
 
     return record_ids
 
 
+def batch_update(token: str, app_token: str, table_id: str, updates: list[dict]) -> list[str]:
+    """批量更新记录（每项含 record_id 和 fields），返回成功更新的 record_id 列表
+
+    整批失败时逐条重试，单条失效的 record_id 不会拖累同批其他记录。
+    """
+    updated = []
+    for i in range(0, len(updates), BATCH_SIZE):
+        batch = updates[i:i + BATCH_SIZE]
+        try:
+            api_request("POST",
+                        f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update",
+                        token, json={"records": batch})
+            updated.extend(u["record_id"] for u in batch)
+            continue
+        except Exception as e:
+            print(f"  批量更新失败（第 {i // BATCH_SIZE + 1} 批），改为逐条更新: {e}", file=sys.stderr)
+
+        for u in batch:
+            try:
+                update_record(token, app_token, table_id, u["record_id"], u["fields"])
+                updated.append(u["record_id"])
+            except Exception as e:
+                print(f"  更新失败 [{u['record_id']}]: {e}", file=sys.stderr)
+
+    return updated
+
+
 def update_record(token: str, app_token: str, table_id: str, record_id: str, fields: dict):
     """更新单条记录"""
     api_request("PUT", f"/bitable/v1/apps/{app_token}/tables/{table_id}/records/{record_id}",
@@ -361,70 +544,112 @@ def mcp_to_fields(entry: dict) -> dict:
 
 # ── 同步逻辑 ────────────────────────────────────────────────────
 
+def record_name(value) -> str:
+    """取记录名称字段的文本；文本字段可能以富文本片段列表返回"""
+    if isinstance(value, list):
+        return value[0].get("text", "") if value else ""
+    return value if isinstance(value, str) else ""
+
+
+def fields_digest(record_id: str, fields: dict) -> str:
+    """记录内容摘要；包含 record_id，远程记录重建后摘要自然失效"""
+    payload = json.dumps([record_id, fields], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 def sync_table(token: str, app_token: str, table_id: str,
                entries: dict, record_map: dict, to_fields_fn,
-               name_field: str, skill_name: str = None) -> dict:
+               name_field: str, skill_name: str = None,
+               field_hashes: dict = None, label: str = "",
+               force_remote_scan: bool = False, force: bool = False) -> tuple[dict, int]:
     """
     通用表同步逻辑
-    返回更新后的 record_map
+    field_hashes 记录上次成功写入的内容摘要（就地更新），未变化的记录跳过
+    label 用于区分并行同步时的输出
+    待同步条目都已在 record_map 中时不拉取全表，force_remote_scan 强制拉取
+    force 忽略已存摘要重写全部记录（覆盖飞书中的手动修改），写入成功后仍记录新摘要
+    返回 (更新后的 record_map, 写入失败的记录数)
     """
+    prefix = f"[{label}] " if label else ""
+    if field_hashes is None:
+        field_hashes = {}
+
     # 筛选要同步的条目
     if skill_name:
         if skill_name not in entries:
-            print(f"  未找到: {skill_name}")
-            return record_map
+            print(f"  {prefix}未找到: {skill_name}")
+            return record_map, 0
         to_sync = {skill_name: entries[skill_name]}
     else:
         to_sync = entries
 
-    # 获取已有记录，重建映射
-    existing_records = list_records(token, app_token, table_id)
-    remote_map = {}
-    for item in existing_records:
-        fields = item.get("fields", {})
-        rname = ""
-        name_val = fields.get(name_field, "")
-        if isinstance(name_val, list):
-            rname = name_val[0].get("text", "") if name_val else ""
-        elif isinstance(name_val, str):
-            rname = name_val
-        if rname:
-            remote_map[rname] = item.get("record_id", "")
-
-    # 合并远程映射到本地
-    record_map.update(remote_map)
+    # 待同步条目本地都已有 record_id 时直接使用，省去全表分页拉取；
+    # 配合内容摘要，无变化的全量同步不产生任何记录请求
+    use_local_map = not force_remote_scan and all(name in record_map for name in to_sync)
+
+    if not use_local_map:
+        # 逐页拉取已有记录（只取名称字段），以远程为准重建映射；
+        # 远程已删除的记录不再保留失效的 record_id
+        remote_map = {
+            name: item.get("record_id", "")
+            for item in iter_records(token, app_token, table_id, [name_field])
+            if (name := record_name(item.get("fields", {}).get(name_field, "")))
+        }
+        record_map.clear()
+        record_map.update(remote_map)
 
     new_records = []
     new_names = []
-    updated = 0
+    updates = []
+    pending = {}  # record_id -> (name, digest)
+    skipped = 0
 
     for name, entry in to_sync.items():
         fields = to_fields_fn(entry)
         rid = record_map.get(name)
 
         if rid:
-            # 已有记录 → 更新
-            try:
-                update_record(token, app_token, table_id, rid, fields)
-                updated += 1
-            except Exception as e:
-                print(f"  更新失败 [{name}]: {e}", file=sys.stderr)
+            # 内容与上次写入一致 → 跳过
+            digest = fields_digest(rid, fields)
+            if not force and field_hashes.get(name) == digest:
+                skipped += 1
+                continue
+            # 已有记录 → 批量更新
+            updates.append({"record_id": rid, "fields": fields})
+            pending[rid] = (name, digest)
         else:
             # 新记录
             new_records.append(fields)
             new_names.append(name)
 
+    updated = batch_update(token, app_token, table_id, updates)
+    if use_local_map and len(updated) < len(updates):
+        # 本地 record_id 可能已失效（远程记录被删除），丢弃失败项后拉取全表重试一次
+        print(f"  {prefix}本地记录映射可能已过期，重新拉取远程记录...")
+        for rid in pending.keys() - set(updated):
+            record_map.pop(pending[rid][0], None)
+        return sync_table(token, app_token, table_id, entries, record_map, to_fields_fn,
+                          name_field, skill_name, field_hashes, label,
+                          force_remote_scan=True, force=force)
+    for rid in updated:
+        name, digest = pending[rid]
+        field_hashes[name] = digest
+    failed = len(updates) - len(updated)
+
     # 批量创建新记录
     if new_records:
         try:
             new_ids = batch_create(token, app_token, table_id, new_records)
-            for nm, rid in zip(new_names, new_ids):
+            for nm, fields, rid in zip(new_names, new_records, new_ids):
                 record_map[nm] = rid
+                field_hashes[nm] = fields_digest(rid, fields)
         except Exception as e:
-            print(f"  批量创建失败: {e}", file=sys.stderr)
+            print(f"  {prefix}批量创建失败: {e}", file=sys.stderr)
+            failed += len(new_records)
 
-    print(f"  新增: {len(new_records)} | 更新: {updated}")
-    return record_map
+    print(f"  {prefix}新增: {len(new_records)} | 更新: {len(updated)} | 未变化跳过: {skipped}"
+          + (f" | 失败: {failed}" if failed else ""))
+    return record_map, failed
 
 
 def update_registry_status(registry: dict, section: str, synced_names: dict):
@@ -452,6 +677,10 @@ def main():
                         help="飞书配置路径")
     parser.add_argument("--skill-name", help="增量模式: 指定技能名称")
     parser.add_argument("--mcp-name", help="增量模式: 指定 MCP 名称")
+    parser.add_argument("--force-remote-scan", action="store_true",
+                        help="总是拉取远程全表记录重建映射并重新检查字段（飞书中手动删改后使用）")
+    parser.add_argument("--force", action="store_true",
+                        help="注册表自上次同步后未变化时也执行同步，重新检查字段并重写全部记录")
     args = parser.parse_args()
 
     # 加载注册表
@@ -459,49 +688,78 @@ def main():
     if not reg_path.exists():
         print("Error: 注册表不存在，请先运行 scan.py", file=sys.stderr)
         sys.exit(1)
-    registry = json.loads(reg_path.read_text(encoding="utf-8"))
+    registry = _loads(reg_path.read_bytes())
 
     # 加载飞书凭据
     env_path = Path(args.env)
     app_id, app_secret = load_env(env_path)
 
-    # 获取 token
-    print("认证中...")
-    token = get_token(app_id, app_secret)
-
-    # 确保表格存在
     config_path = Path(args.config)
     config = load_config(config_path)
-    config = ensure_tables(token, config, config_path)
 
-    # 同步技能表
-    print(f"\n同步技能表...")
+    # 注册表自上次同步写回后没有再被修改，全量同步无事可做
+    if (args.mode == "full" and not args.force and not args.force_remote_scan
+            and reg_path.stat().st_mtime <= config.get("last_sync_ts", 0)):
+        print("注册表自上次同步后无变更，跳过（--force 强制同步）")
+        return
+
+    # 强制同步时也重新检查字段，手动删除的字段会被补回
+    if args.force or args.force_remote_scan:
+        config["schema_version"] = None
+
+    # 获取 token（未过期时复用缓存）
+    print("认证中...")
+    token = get_token_cached(app_id, app_secret, config, config_path)
+
+    # 确保表格存在；缓存的 token 被提前吊销时强制刷新一次
+    try:
+        config = ensure_tables(token, config, config_path)
+    except TokenInvalidError:
+        token = get_token_cached(app_id, app_secret, config, config_path, force=True)
+        config = ensure_tables(token, config, config_path)
+
+    # 两张表互不依赖，并行同步；配置在两者都完成后再保存
+    print("\n同步技能表和 MCP 服务器表...")
     skill_name = args.skill_name if args.mode == "incremental" else None
-    config["skill_record_map"] = sync_table(
-        token, config["app_token"], config["skill_table_id"],
-        registry.get("skills", {}), config.get("skill_record_map", {}),
-        skill_to_fields, "技能名称", skill_name
-    )
-
-    # 同步 MCP 表
-    print(f"同步 MCP 服务器表...")
     mcp_name = args.mcp_name if args.mode == "incremental" else None
-    config["mcp_record_map"] = sync_table(
-        token, config["app_token"], config["mcp_table_id"],
-        registry.get("mcp_servers", {}), config.get("mcp_record_map", {}),
-        mcp_to_fields, "服务器名称", mcp_name
-    )
-
-    # 保存配置
-    config["last_sync"] = time.strftime("%Y-%m-%d %H:%M:%S")
-    save_config(config, config_path)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_skill = executor.submit(
+            sync_table,
+            token, config["app_token"], config["skill_table_id"],
+            registry.get("skills", {}), config.get("skill_record_map", {}),
+            skill_to_fields, "技能名称", skill_name,
+            config.setdefault("skill_field_hashes", {}), "技能",
+            force_remote_scan=args.force_remote_scan,
+            force=args.force or args.force_remote_scan,
+        )
+        future_mcp = executor.submit(
+            sync_table,
+            token, config["app_token"], config["mcp_table_id"],
+            registry.get("mcp_servers", {}), config.get("mcp_record_map", {}),
+            mcp_to_fields, "服务器名称", mcp_name,
+            config.setdefault("mcp_field_hashes", {}), "MCP",
+            force_remote_scan=args.force_remote_scan,
+            force=args.force or args.force_remote_scan,
+        )
+        config["skill_record_map"], skill_failed = future_skill.result()
+        config["mcp_record_map"], mcp_failed = future_mcp.result()
 
     # 更新注册表同步状态
     update_registry_status(registry, "skills", config["skill_record_map"])
     update_registry_status(registry, "mcp_servers", config["mcp_record_map"])
-    reg_path.write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
+    _dump_atomic(registry, reg_path)
 
-    print(f"\n同步完成!")
+    # 保存配置；仅在全量同步全部成功时记录 last_sync_ts（写回后注册表的 mtime），
+    # 否则下次全量同步不会跳过，失败的记录（没有内容摘要）会被重试
+    config["last_sync"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    if args.mode == "full" and not skill_failed and not mcp_failed:
+        config["last_sync_ts"] = reg_path.stat().st_mtime
+    save_config(config, config_path)
+
+    if skill_failed or mcp_failed:
+        print(f"\n同步完成，但有 {skill_failed + mcp_failed} 条记录写入失败，下次同步会重试", file=sys.stderr)
+    else:
+        print(f"\n同步完成!")
     if config.get("bitable_url"):
         print(f"飞书表格地址: {config['bitable_url']}")
 